@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for HTML content extraction
+
+Measures content parser backends on the sample HTML files and on a synthetic
+tag-dense page. Usage::
+
+  python benchmarks/bench_parser.py
+"""
+
+import os
+import sys
+import timeit
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(this_dir)
+sys.path.insert(0, base_dir)
+
+from xliff_converter import html_parser as hp  # noqa: E402
+
+SAMPLES = ('sample.html', 'sample_html4.html', 'sample_html5.html', 'sample_moby.html')
+
+TAG_DENSE_HTML = '<html><body>{}</body></html>'.format(''.join(
+    '<div class="row"><p>Item <b>{0}</b> with <a href="#{0}">link</a>'
+    '<img src="{0}.png" alt="Image {0}"><br><span>and more</span>.</p></div>'.format(i)
+    for i in range(2000)
+))
+
+
+def load_samples():
+    documents = []
+    for name in SAMPLES:
+        with open(os.path.join(base_dir, 'samples', name), 'rb') as fo:
+            html = fo.read()
+        documents.append((name, html.decode(hp.detect_encoding(html) or 'utf-8')))
+    documents.append(('tag-dense (synthetic)', TAG_DENSE_HTML))
+    return documents
+
+
+def parse(html, backend=hp.DEFAULT_BACKEND):
+    parser = hp.get_content_parser(backend=backend)
+    parser.feed(html)
+    return parser.content_list
+
+
+class EventRecorder(hp.HTMLParser):
+    """
+    Records tag events of a HTML document
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.events = []
+
+    def handle_starttag(self, tag, attrs):
+        self.events.append(('handle_starttag', tag, attrs, self.get_starttag_text()))
+
+    def handle_startendtag(self, tag, attrs):
+        self.events.append(('handle_startendtag', tag, attrs, self.get_starttag_text()))
+
+    def handle_endtag(self, tag):
+        self.events.append(('handle_endtag', tag, None, None))
+
+
+def handle_tags(events):
+    """
+    Replay recorded tag events on ``ContentParser`` bypassing tokenization
+    """
+    parser = hp.ContentParser()
+    for method, tag, attrs, text in events:
+        if attrs is None:
+            parser.handle_endtag(tag)
+        else:
+            parser.lasttag = tag
+            parser._HTMLParser__starttag_text = text
+            getattr(parser, method)(tag, attrs)
+
+
+def main(repeat=5):
+    documents = load_samples()
+    for backend in sorted(hp.PARSER_BACKENDS):
+        print('Document parsing ({}):'.format(backend))
+        for name, html in documents:
+            number = max(1, 200000 // len(html))
+            best = min(timeit.repeat(lambda: parse(html, backend),
+                                     number=number, repeat=repeat))
+            print('  {:<24} {:>9} chars {:>10.3f} ms/doc'.format(
+                name, len(html), best / number * 1000))
+    print('Tag handling:')
+    for name, html in documents:
+        recorder = EventRecorder()
+        recorder.feed(html)
+        events = recorder.events
+        number = max(1, 20000 // len(events))
+        best = min(timeit.repeat(lambda: handle_tags(events), number=number, repeat=repeat))
+        print('  {:<24} {:>9} tags  {:>10.3f} us/tag'.format(
+            name, len(events), best / number / len(events) * 1000000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import pytest
+from functools import partial
+from xliff_converter import archives
+from xliff_converter import xliff2html
+from .test_html_rebuilder import XLIFF, HTML_RU
+
+FILES = [('index.html', b'<p>Index</p>'), ('docs/page.html', b'<p>Page</p>'),
+         ('docs/image.png', b'\x89PNG')]
+
+
+def upper_html(name, data):
+    if name.endswith('.html'):
+        return name[:-5] + '.txt', data.upper()
+    return None
+
+
+def fail_on_page(name, data):
+    if name == 'docs/page.html':
+        raise ValueError('Broken page')
+    return upper_html(name, data)
+
+
+@pytest.mark.parametrize('ext', ['.zip', '.tar', '.tar.gz'])
+def test_write_read_archive(tmpdir, ext):
+    path = str(tmpdir.join('site' + ext))
+    with archives.ArchiveWriter(path) as writer:
+        for name, data in FILES:
+            writer.add(name, data)
+    assert archives.is_archive(path)
+    assert list(archives.iter_archive(path)) == FILES
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_convert_archive(tmpdir, jobs):
+    input_path = str(tmpdir.join('site.tar.gz'))
+    output_path = str(tmpdir.join('site_out.zip'))
+    with archives.ArchiveWriter(input_path) as writer:
+        for name, data in FILES:
+            writer.add(name, data)
+    assert archives.convert_archive(input_path, output_path, upper_html, jobs) == (2, [])
+    assert list(archives.iter_archive(output_path)) == [
+        ('index.txt', b'<P>INDEX</P>'), ('docs/page.txt', b'<P>PAGE</P>')
+    ]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_convert_archive_errors(tmpdir, jobs):
+    input_path = str(tmpdir.join('site.zip'))
+    output_path = str(tmpdir.join('site_out.zip'))
+    with archives.ArchiveWriter(input_path) as writer:
+        for name, data in FILES + [('last.html', b'<p>Last</p>')]:
+            writer.add(name, data)
+    result = archives.convert_archive(input_path, output_path, fail_on_page, jobs)
+    assert result.converted == 2
+    assert [(name, str(error)) for name, error in result.errors] == \
+        [('docs/page.html', 'Broken page')]
+    assert list(archives.iter_archive(output_path)) == [
+        ('index.txt', b'<P>INDEX</P>'), ('last.txt', b'<P>LAST</P>')
+    ]
+
+
+def test_split_archive_ext():
+    assert archives.split_archive_ext('foo/site.TAR.GZ') == ('foo/site', '.TAR.GZ')
+    assert archives.split_archive_ext('site.xlf') == ('site.xlf', '')
+    with pytest.raises(ValueError):
+        archives.ArchiveWriter('site.xlf')
+
+
+def test_rebuild_html_archive(tmpdir):
+    input_path = str(tmpdir.join('site_xliff.zip'))
+    output_path = str(tmpdir.join('site_html.zip'))
+    with archives.ArchiveWriter(input_path) as writer:
+        writer.add('docs/example.xlf', XLIFF.encode('utf-8'))
+        writer.add('docs/readme.txt', b'Readme')
+    convert = partial(xliff2html.convert_member, strict=True)
+    assert archives.convert_archive(input_path, output_path, convert).converted == 1
+    assert list(archives.iter_archive(output_path)) == [
+        ('docs/example_ru-RU.html', HTML_RU.encode('utf-8'))
+    ]
@@ -0,0 +1,76 @@
+import os
+from xliff_converter import html_parser as hp
+from xliff_converter.cache import ConversionCache
+
+
+def test_make_key():
+    key = ConversionCache.make_key('<p>Text</p>', 'index.html', 'html')
+    assert key == ConversionCache.make_key(b'<p>Text</p>', 'index.html', 'html')
+    assert key != ConversionCache.make_key('<p>Text</p>', 'other.html', 'html')
+    assert key != ConversionCache.make_key('<p>Text</p>', 'index.html', 'xhtml')
+    assert key != ConversionCache.make_key('<p>Other</p>', 'index.html', 'html')
+
+
+def test_get_put(tmpdir):
+    cache = ConversionCache(str(tmpdir))
+    assert cache.get('foo') is None
+    cache.put('foo', b'<xliff/>')
+    assert cache.get('foo') == b'<xliff/>'
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.size == 8
+    assert ConversionCache(str(tmpdir)).size == 8
+    assert '1 hits, 1 misses' in cache.stats
+
+
+def test_get_evicted_while_reading(tmpdir, monkeypatch):
+    cache = ConversionCache(str(tmpdir))
+    cache.put('foo', b'<xliff/>')
+
+    def utime(path):
+        os.remove(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, 'utime', utime)
+    assert cache.get('foo') == b'<xliff/>'
+
+
+def test_lru_eviction(tmpdir):
+    cache = ConversionCache(str(tmpdir), max_size=25)
+    cache.put('first', b'0123456789')
+    cache.put('second', b'0123456789')
+    os.utime(os.path.join(str(tmpdir), 'second.xlf'), (1, 1))
+    cache.get('first')
+    cache.put('third', b'0123456789')
+    assert cache.get('second') is None
+    assert cache.get('first') is not None
+    assert cache.get('third') is not None
+    assert cache.size == 20
+
+
+def test_eviction_low_water_mark(tmpdir, monkeypatch):
+    cache = ConversionCache(str(tmpdir), max_size=1000)
+    evictions = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, '_evict', lambda: evictions.append(1) or evict())
+    for i in range(200):
+        cache.put(str(i), b'0123456789')
+    assert cache.size <= 1000
+    # Each eviction frees 20% of the max. size
+    assert len(evictions) == 5
+
+
+def test_convert_html_cached(tmpdir):
+    cache = ConversionCache(str(tmpdir))
+    html = '<p>Cached text.</p>'
+    cache.put(cache.make_key(html, 'page.html', 'html', *hp.cache_options(hp.DEFAULT_RULES)), b'<xliff/>')
+    assert hp.convert_html(html, 'page.html', cache=cache) == b'<xliff/>'
+    assert cache.hits == 1
+
+
+def test_cache_options(monkeypatch):
+    options = hp.cache_options(hp.DEFAULT_RULES)
+    monkeypatch.setattr(hp, 'OUTPUT_VERSION', hp.OUTPUT_VERSION + 1)
+    assert hp.cache_options(hp.DEFAULT_RULES) != options
+    monkeypatch.undo()
+    monkeypatch.setattr(hp, 'nltk_version', '0.0')
+    assert hp.cache_options(hp.DEFAULT_RULES) != options
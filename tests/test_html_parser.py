@@ -1,5 +1,6 @@
 import os
 import sys
+import pytest
 from xliff_converter import html_parser as hp
 
 HTML5 = '''<!DOCTYPE html>
@@ -68,6 +69,62 @@ def test_content_parser_html5():
     assert 'console.log(\'Hello World!\');' not in cont_list
 
 
+def test_content_parser_custom_rules():
+    rules = hp.DEFAULT_RULES._replace(
+        translatable_attrs=dict(hp.TRANSLATABLE_ATTRS, **{
+            '*': ('title', 'aria-label'),
+            'input': ('placeholder',),
+        }),
+        ignore_block_tags=hp.IGNORE_BLOCK_TAGS + ('nav',),
+    )
+    parser = hp.ContentParser(rules)
+    parser.feed('<nav>Menu</nav>'
+                '<div title="Div title"><p>Text</p></div>'
+                '<input placeholder="Your name" aria-label="Name">'
+                '<img src="foo.png" alt="Image caption" title="Image title" />')
+    assert parser.content_list == ['Div title', 'Text', 'Your name', 'Name',
+                                   'Image caption', 'Image title']
+    parser = hp.ContentParser()
+    parser.feed('<div title="Div title"><p>Text</p></div>')
+    assert parser.content_list == ['Text']
+
+
+def test_compiled_rules_cache():
+    translatable_attrs = dict(hp.TRANSLATABLE_ATTRS)
+    rules = hp.DEFAULT_RULES._replace(translatable_attrs=translatable_attrs)
+    parser = hp.ContentParser(rules)
+    parser.feed('<div title="Div title"><p>Text</p></div>')
+    assert parser.content_list == ['Text']
+    translatable_attrs['*'] = ('title',)
+    parser = hp.ContentParser(rules)
+    parser.feed('<div title="Div title"><p>Text</p></div>')
+    assert parser.content_list == ['Div title', 'Text']
+    for i in range(hp.COMPILED_RULES_CACHE_SIZE * 2):
+        hp.ContentParser(rules._replace(break_tags=('br', 'tag{}'.format(i))))
+    assert len(hp.ContentParser._compiled_rules) == hp.COMPILED_RULES_CACHE_SIZE
+
+
+def test_content_parser_attrs_in_text():
+    rules = hp.DEFAULT_RULES._replace(
+        translatable_attrs=dict(hp.TRANSLATABLE_ATTRS, **{'*': ('title',)})
+    )
+    html = '<table><tr><td>Price <button title="Close">x</button></td></tr></table>' \
+           '<p>See <a title="Tip">here</a></p>'
+    for backend in sorted(hp.PARSER_BACKENDS):
+        parser = hp.get_content_parser(rules, backend)
+        parser.feed(html)
+        assert parser.content_list == ['Price', 'Close', 'x', 'See <a title="Tip">here</a>']
+        assert hp.create_skeleton(parser.content_list, html) == \
+            '<table><tr><td>{{%1%}} <button title="{{%2%}}">{{%3%}}</button></td></tr></table>' \
+            '<p>{{%4%}}</p>'
+
+
+def test_get_content_parser():
+    assert isinstance(hp.get_content_parser(backend='html.parser'), hp.ContentParser)
+    with pytest.raises(ValueError):
+        hp.get_content_parser(backend='foo')
+
+
 def test_segment_html():
     segments = list(hp.segment_html(HTML5))
     assert len(segments) == 19
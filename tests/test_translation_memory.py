@@ -0,0 +1,68 @@
+from xml.dom.minidom import parseString
+from xliff_converter import html_parser as hp
+from xliff_converter import html_rebuilder as hr
+from xliff_converter import translation_memory as tmm
+from .test_html_rebuilder import XLIFF, XLIFF_INCOMPLETE
+
+
+def test_normalize_segment():
+    assert tmm.normalize_segment('  Page\n   body&nbsp;text ') == 'Page body text'
+
+
+def test_add_lookup(tmpdir):
+    with tmm.TranslationMemory(str(tmpdir.join('tm.db'))) as tm:
+        tm.add([('Page title', 'Титул страницы')], 'en', 'ru-RU')
+        assert tm.lookup(['Page  title', 'Other', 'Page title'], 'en', 'ru-ru') == \
+            ['Титул страницы', None, 'Титул страницы']
+        assert tm.lookup(['Page title'], 'en', 'uk-UA') == [None]
+
+
+def test_lookup_batches(tmpdir):
+    with tmm.TranslationMemory(str(tmpdir.join('tm.db'))) as tm:
+        count = tmm.QUERY_BATCH_SIZE * 2 + 1
+        tm.add((('Segment {}'.format(i), str(i)) for i in range(count)), 'en', 'ru')
+        segments = ['Segment {}'.format(i) for i in range(count)]
+        assert tm.lookup(segments, 'en', 'ru') == [str(i) for i in range(count)]
+
+
+def test_import_xliff(tmpdir):
+    with tmm.TranslationMemory(str(tmpdir.join('tm.db'))) as tm:
+        assert tm.import_xliff(XLIFF_INCOMPLETE) == 2
+        assert tm.import_xliff(XLIFF) == 3
+        assert tm.lookup(['Page body with <strong>text formatting</strong>.'], 'en', 'ru-RU') == \
+            ['Содержимое страницы с <strong>форматированием текста</strong>.']
+
+
+def test_import_translation(tmpdir):
+    with tmm.TranslationMemory(str(tmpdir.join('tm.db'))) as tm:
+        assert tm.import_translation(hr.extract_translation(XLIFF_INCOMPLETE, strict=False)) == 2
+        assert tm.lookup(['Page Header'], 'en', 'ru-RU') == ['Заголовок страницы']
+
+
+def test_import_xliff_skips_empty_targets(tmpdir):
+    xliff = XLIFF.replace('<target>Титул страницы</target>', '<target></target>') \
+        .replace('<target>Заголовок страницы</target>', '<target> </target>')
+    with tmm.TranslationMemory(str(tmpdir.join('tm.db'))) as tm:
+        assert tm.import_xliff(xliff) == 1
+        assert tm.lookup(['Page Title', 'Page Header'], 'en', 'ru-RU') == [None, None]
+
+
+def test_import_xliff_keeps_targets_identical_to_sources(tmpdir):
+    xliff = XLIFF.replace('<target>Титул страницы</target>', '<target>Page Title</target>')
+    with tmm.TranslationMemory(str(tmpdir.join('tm.db'))) as tm:
+        assert tm.import_xliff(xliff) == 3
+        assert tm.lookup(['Page Title'], 'en', 'ru-RU') == ['Page Title']
+
+
+def test_create_xliff_with_translations():
+    xliff = hp.create_xliff(['Page title', 'Page <b>body</b>'], '{{%1%}}{{%2%}}',
+                            'index.html', translations=[None, 'Тело <b>страницы</b>'],
+                            target_language='ru-RU')
+    doc = parseString(xliff)
+    assert doc.getElementsByTagName('file')[0].getAttribute('target-language') == 'ru-RU'
+    units = doc.getElementsByTagName('trans-unit')
+    assert not units[0].getElementsByTagName('target')
+    target = units[1].getElementsByTagName('target')[0]
+    assert target.getAttribute('state') == 'translated'
+    assert target.toxml() == '<target state="translated">Тело <bpt id="1">&lt;b&gt;</bpt>' \
+                             'страницы<ept id="1">&lt;/b&gt;</ept></target>'
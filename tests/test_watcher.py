@@ -0,0 +1,40 @@
+import os
+from xliff_converter import html_parser as hp
+from xliff_converter.watcher import DirectoryWatcher
+
+
+def test_directory_watcher(tmpdir):
+    tmpdir.mkdir('docs')
+    index = tmpdir.join('index.html')
+    page = tmpdir.join('docs', 'page.HTM')
+    index.write('<p>Index</p>')
+    page.write('<p>Page</p>')
+    tmpdir.join('image.png').write('PNG')
+    watcher = DirectoryWatcher(str(tmpdir), ('.html', '.htm'))
+    assert watcher.poll() == ([str(page), str(index)], [])
+    assert watcher.poll() == ([], [])
+    page.write('<p>Changed page</p>')
+    new = tmpdir.join('new.html')
+    new.write('<p>New</p>')
+    os.remove(str(index))
+    assert watcher.poll() == ([str(page), str(new)], [str(index)])
+
+
+def test_block_segmenter(monkeypatch):
+    calls = []
+
+    def sent_tokenize(text):
+        calls.append(text)
+        return [sent.strip() + '.' for sent in text.split('.') if sent.strip()]
+
+    monkeypatch.setattr(hp, 'sent_tokenize', sent_tokenize)
+    segmenter = hp.BlockSegmenter()
+    assert segmenter.segment(['First. Second.', 'Third.', 'Third.']) == \
+        ['First.', 'Second.', 'Third.', 'Third.']
+    assert calls == ['First. Second.', 'Third.']
+    assert segmenter.segment(['Third.', 'Fourth.', '<pre><code>x = 1</code></pre>']) == \
+        ['Third.', 'Fourth.']
+    assert calls == ['First. Second.', 'Third.', 'Fourth.']
+    # Only blocks of the last document are kept
+    segmenter.segment(['First. Second.'])
+    assert calls[-1] == 'First. Second.'
@@ -0,0 +1,58 @@
+import os
+from xml.dom.minidom import parseString
+from xliff_converter import html_rebuilder as hr
+from xliff_converter.xliff_document import XliffDocument
+from .test_html_rebuilder import XLIFF, XLIFF_INCOMPLETE, HTML_RU
+
+
+def write_xliff(tmpdir, xliff):
+    path = str(tmpdir.join('example.xlf'))
+    with open(path, 'wb') as fo:
+        fo.write(xliff.encode('utf-8'))
+    return path
+
+
+def test_random_access(tmpdir):
+    doc = XliffDocument(write_xliff(tmpdir, XLIFF))
+    assert list(doc) == ['1', '2', '3'] and len(doc) == 3 and '2' in doc
+    assert doc.filename == 'example.html'
+    assert doc.target_language == 'ru-RU'
+    assert doc.get_source('1') == 'Page Title'
+    assert doc.get_target('3') == 'Содержимое страницы с <strong>форматированием текста</strong>.'
+    assert doc.skeleton == hr.extract_translation(XLIFF).skeleton
+    assert doc.get_unit('2').getAttribute('xml:space') == 'preserve'
+
+
+def test_update_unit(tmpdir):
+    path = write_xliff(tmpdir, XLIFF_INCOMPLETE)
+    doc = XliffDocument(path)
+    assert doc.get_target('3') is None
+    unit = doc.get_unit('3')
+    target = parseString(
+        '<target>Содержимое страницы с <bpt id="1">&lt;strong&gt;</bpt>'
+        'форматированием текста<ept id="1">&lt;/strong&gt;</ept>.</target>'
+    ).documentElement
+    unit.appendChild(target)
+    doc.update_unit(unit)
+    unit = doc.get_unit('2')
+    unit.getElementsByTagName('source')[0].firstChild.data = 'Page Heade!'
+    doc.update_unit(unit)
+    with open(path, 'r', encoding='utf-8') as fo:
+        assert hr.rebuild_html(fo.read()).html == HTML_RU
+    assert XliffDocument(path).get_target('3') == doc.get_target('3')
+
+
+def test_index_sidecar(tmpdir):
+    path = write_xliff(tmpdir, XLIFF)
+    index_path = path + '.idx'
+    with XliffDocument(path, index_path) as doc:
+        assert os.path.exists(index_path)
+        assert list(XliffDocument(path, index_path)) == ['1', '2', '3']
+        unit = doc.get_unit('1')
+        unit.getElementsByTagName('target')[0].firstChild.data = 'Новый титул'
+        doc.update_unit(unit)
+    assert XliffDocument(path, index_path).get_target('1') == 'Новый титул'
+    assert XliffDocument(path, index_path).get_target('3') == doc.get_target('3')
+    with open(path, 'ab') as fo:
+        fo.write(b'\n')
+    assert XliffDocument(path, index_path).get_source('2') == 'Page Header'
@@ -0,0 +1,73 @@
+import io
+from xliff_converter import xliff_validator as xv
+from .test_html_rebuilder import XLIFF, XLIFF_BROKEN, XLIFF_INCOMPLETE
+
+XLIFF_TAGS = '<?xml version="1.0" encoding="utf-8"?>\n' \
+             '<xliff version="1.2">\n' \
+             '<file datatype="html" original="example.html" source-language="en" target-language="ru-RU">\n' \
+             '<header><skl><internal_file form="base64">' \
+             'PHA+e3slMSV9fTwvcD48cD57eyUyJX19PC9wPg==' \
+             '</internal_file></skl></header>\n' \
+             '<body>\n' \
+             '<trans-unit id="1" xml:space="preserve">\n' \
+             '<source><bpt id="1">&lt;b&gt;</bpt>Bold<ept id="1">&lt;/b&gt;</ept></source>\n' \
+             '<target><bpt id="1">&lt;b&gt;</bpt>Жирный<ept id="2">&lt;/b&gt;</ept></target>\n' \
+             '</trans-unit>\n' \
+             '<trans-unit id="3" xml:space="preserve">\n' \
+             '<source>Text</source>\n' \
+             '<target></target>\n' \
+             '<alt-trans><target>Текст</target></alt-trans>\n' \
+             '</trans-unit>\n' \
+             '</body></file></xliff>'
+
+
+def test_valid_xliff():
+    assert xv.validate_xliff(XLIFF) == []
+    assert xv.validate_xliff(io.BytesIO(XLIFF.encode('utf-8'))) == []
+
+
+def test_partial_xliff():
+    issues = xv.validate_xliff(XLIFF_INCOMPLETE)
+    assert issues == [xv.ValidationIssue(1, '3', 'Missing translation')]
+    assert xv.validate_xliff(XLIFF_INCOMPLETE, strict=False) == []
+
+
+def test_broken_xliff():
+    messages = [issue.message for issue in xv.validate_xliff(XLIFF_BROKEN)]
+    assert messages == ['XLIFF has no target language specified',
+                        'XLIFF has no document skeleton']
+    issues = xv.validate_xliff(XLIFF[:-20])
+    assert len(issues) == 1 and issues[0].message.startswith('Malformed XML')
+
+
+def test_all_issues_reported():
+    issues = xv.validate_xliff(io.BytesIO(XLIFF_TAGS.encode('utf-8')))
+    assert issues == [
+        xv.ValidationIssue(8, '1', 'Unmatched <bpt id="1"> in <target>'),
+        xv.ValidationIssue(8, '1', 'Unmatched <ept id="2"> in <target>'),
+        xv.ValidationIssue(10, '3', 'Empty translation'),
+        xv.ValidationIssue(10, '3', 'Trans-unit id is not present in the skeleton'),
+        xv.ValidationIssue(4, '2', 'Skeleton placeholder has no trans-unit'),
+    ]
+
+
+def test_skeleton_chunks():
+    validator = xv.XliffValidator()
+    data = XLIFF_TAGS.encode('utf-8')
+    for i in range(len(data)):
+        validator.feed(data[i:i + 1])
+    validator.feed(b'', True)
+    assert validator.issues == xv.validate_xliff(XLIFF_TAGS)
+    scanner = xv._SkeletonScanner()
+    for chunk in ('PHA+e3sl', 'M', 'SV9fTwvcD48c', 'D57eyUyJX19PC9wPg=='):
+        scanner.feed(chunk)
+    scanner.close()
+    assert scanner.ids == {'1', '2'}
+
+
+def test_invalid_skeleton():
+    for skeleton in ('PHA+e3slMSV9fT', 'PHA+e3sl!SV9fTw==', '/w=='):
+        xliff = XLIFF_TAGS.replace('PHA+e3slMSV9fTwvcD48cD57eyUyJX19PC9wPg==', skeleton)
+        messages = [issue.message for issue in xv.validate_xliff(xliff)]
+        assert messages.count('Skeleton is not valid base64 data') == 1
+        assert 'Skeleton placeholder has no trans-unit' not in messages
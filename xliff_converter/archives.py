@@ -0,0 +1,214 @@
+"""
+Archive processing module
+
+Reads documents from zip and tar archives and writes conversion results
+into an output archive without unpacking files to disk.
+"""
+
+import io
+import posixpath
+import time
+import tarfile
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+__all__ = ['is_archive', 'iter_archive', 'ArchiveWriter', 'convert_archive']
+
+ArchiveResult = namedtuple('ArchiveResult', ['converted', 'errors'])
+
+TAR_MODES = (
+    ('.tar', 'w'),
+    ('.tar.gz', 'w:gz'),
+    ('.tgz', 'w:gz'),
+    ('.tar.bz2', 'w:bz2'),
+    ('.tar.xz', 'w:xz'),
+)
+
+
+def is_archive(path):
+    """
+    Check if a path is a supported archive
+
+    :param path: file path
+    :type path: str
+    :return: ``True`` if the path is a zip or tar archive
+    :rtype: bool
+    """
+    return split_archive_ext(path)[1] != ''
+
+
+def split_archive_ext(path):
+    """
+    Split a path into a base name and archive extension
+
+    :param path: file path
+    :type path: str
+    :return: ``(base, ext)`` tuple where ``ext`` is empty for non-archives
+    :rtype: tuple
+    """
+    lower_path = path.lower()
+    for ext in ('.zip',) + tuple(ext for ext, _ in TAR_MODES):
+        if lower_path.endswith(ext):
+            return path[:-len(ext)], path[-len(ext):]
+    return path, ''
+
+
+def iter_archive(path):
+    """
+    Read regular files from an archive one by one
+
+    Tar archives are read in streaming mode.
+
+    :param path: path to a zip or tar archive
+    :type path: str
+    :return: generator of ``(member_name, contents)`` tuples
+    :rtype: types.GeneratorType
+    """
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.filename.endswith('/'):
+                    yield info.filename, zf.read(info)
+    else:
+        with tarfile.open(path, 'r|*') as tf:
+            for info in tf:
+                if info.isfile():
+                    yield info.name, tf.extractfile(info).read()
+
+
+class ArchiveWriter:
+    """
+    Writes files into a zip or tar archive
+
+    Archive type is selected by the file extension.
+
+    :param path: path to an output archive
+    :type path: str
+    """
+    def __init__(self, path):
+        ext = split_archive_ext(path)[1].lower()
+        if ext == '.zip':
+            self._archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+            self._is_zip = True
+        elif ext:
+            self._archive = tarfile.open(path, dict(TAR_MODES)[ext])
+            self._is_zip = False
+        else:
+            raise ValueError('Unsupported archive type: {}'.format(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, name, data):
+        """
+        Add a file to the archive
+
+        :param name: member name
+        :type name: str
+        :param data: file contents
+        :type data: bytes
+        """
+        if self._is_zip:
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = time.time()
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._archive.close()
+
+
+def convert_archive(input_path, output_path, convert, jobs=1):
+    """
+    Convert files from an input archive and write results into an output archive
+
+    A member that fails to convert does not stop the conversion,
+    it is reported in the result instead.
+
+    :param input_path: path to an input archive
+    :type input_path: str
+    :param output_path: path to an output archive
+    :type output_path: str
+    :param convert: a function that takes a member name and its contents
+        and returns a ``(name, data)`` tuple of the converted file
+        or ``None`` if the member should be skipped. With ``jobs > 1``
+        it must be picklable.
+    :type convert: callable
+    :param jobs: the number of worker processes
+    :type jobs: int
+    :return: the number of converted files and the list
+        of ``(member_name, error)`` tuples for failed members
+    :rtype: ArchiveResult
+    """
+    count = 0
+    errors = []
+    with ArchiveWriter(output_path) as writer:
+        for name, result, error in convert_members(input_path, convert, jobs):
+            if error is not None:
+                errors.append((name, error))
+            elif result is not None:
+                writer.add(*result)
+                count += 1
+    return ArchiveResult(count, errors)
+
+
+def convert_members(input_path, convert, jobs=1):
+    """
+    Convert archive members preserving their order
+
+    :param input_path: path to an input archive
+    :type input_path: str
+    :param convert: conversion function
+    :type convert: callable
+    :param jobs: the number of worker processes
+    :type jobs: int
+    :return: generator of ``(member_name, result, error)`` tuples
+        where ``error`` is an exception raised by ``convert``
+        or ``None``
+    :rtype: types.GeneratorType
+    """
+    if jobs <= 1:
+        for name, data in iter_archive(input_path):
+            try:
+                result = convert(name, data)
+            except Exception as exc:
+                yield name, None, exc
+            else:
+                yield name, result, None
+        return
+    with ProcessPoolExecutor(jobs) as executor:
+        # Limit the number of pending members to keep memory usage bounded
+        pending = deque()
+        for name, data in iter_archive(input_path):
+            pending.append((name, executor.submit(convert, name, data)))
+            if len(pending) >= jobs * 4:
+                yield get_result(*pending.popleft())
+        while pending:
+            yield get_result(*pending.popleft())
+
+
+def get_result(name, future):
+    try:
+        return name, future.result(), None
+    except Exception as exc:
+        return name, None, exc
+
+
+def member_path(member_name, filename):
+    """
+    Get a path of an output file in the directory of an archive member
+
+    :param member_name: archive member name
+    :type member_name: str
+    :param filename: output filename
+    :type filename: str
+    :return: output member name
+    :rtype: str
+    """
+    return posixpath.join(posixpath.dirname(member_name), filename)
@@ -0,0 +1,158 @@
+"""
+Conversion cache module
+
+Stores converted XLIFF documents in a directory on disk so that unchanged
+HTML documents are not parsed again. Cache entries are keyed by a hash
+of the source document, its filename, datatype, the package version
+and conversion options that affect the output (the output format version,
+NLTK version and parser rules).
+When the total size of cached files exceeds the limit, least recently used
+entries are removed.
+"""
+
+import os
+import hashlib
+import tempfile
+from . import __version__
+
+__all__ = ['ConversionCache']
+
+CACHE_EXT = '.xlf'
+# On eviction the cache is shrunk to this fraction of the max. size
+# so that the following puts do not trigger eviction again.
+LOW_WATER_MARK = 0.8
+
+
+class ConversionCache:
+    """
+    On-disk cache of converted XLIFF documents
+
+    When the cache exceeds its max. size, least recently used entries
+    are removed until its size falls below ``LOW_WATER_MARK`` of the max. size.
+
+    :param directory: cache directory. It is created if it does not exist.
+    :type directory: str
+    :param max_size: max. total size of cached files in bytes
+    :type max_size: int
+    """
+    def __init__(self, directory, max_size=256 * 1024 * 1024):
+        self._directory = directory
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def stats(self):
+        """
+        Cache statistics line
+        """
+        total = self.hits + self.misses
+        return 'Cache: {} hits, {} misses ({:.0%} hit rate), {:.1f} MiB used'.format(
+            self.hits, self.misses, self.hits / total if total else 0,
+            self._size / 1024 / 1024
+        )
+
+    @staticmethod
+    def make_key(source, filename, datatype, *options):
+        """
+        Create a cache key for a source document
+
+        :param source: source document
+        :type source: str, bytes
+        :param filename: document filename
+        :type filename: str
+        :param datatype: document datatype
+        :type datatype: str
+        :param options: additional conversion options as strings
+        :return: cache key
+        :rtype: str
+        """
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        hash_ = hashlib.sha256()
+        for item in (__version__, filename, datatype) + options:
+            hash_.update(item.encode('utf-8'))
+            hash_.update(b'\0')
+        hash_.update(source)
+        return hash_.hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached XLIFF document
+
+        :param key: cache key
+        :type key: str
+        :return: XLIFF document or ``None`` if it is not cached
+        :rtype: bytes
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fo:
+                xliff = fo.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            # The entry has been evicted by another process
+            pass
+        self.hits += 1
+        return xliff
+
+    def put(self, key, xliff):
+        """
+        Store a XLIFF document in the cache
+
+        :param key: cache key
+        :type key: str
+        :param xliff: XLIFF document
+        :type xliff: bytes
+        """
+        path = self._path(key)
+        try:
+            self._size -= os.path.getsize(path)
+        except OSError:
+            pass
+        # Write into a temporary file first so that concurrent readers
+        # never see a partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fo:
+            fo.write(xliff)
+        os.replace(tmp_path, path)
+        self._size += len(xliff)
+        if self._size > self._max_size:
+            self._evict()
+
+    def _path(self, key):
+        return os.path.join(self._directory, key + CACHE_EXT)
+
+    def _entries(self):
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(CACHE_EXT) and entry.is_file():
+                stat = entry.stat()
+                yield entry.path, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda item: item[1])
+        self._size = sum(item[2] for item in entries)
+        target_size = self._max_size * LOW_WATER_MARK
+        for path, _, size in entries:
+            if self._size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
@@ -3,34 +3,202 @@ Converts a HTML document into translatable XLIFF 1.2 format
 """
 
 import os
+import sys
+import time
+import posixpath
 from argparse import ArgumentParser
-from .html_parser import convert_html
+from functools import partial
+from .archives import is_archive, split_archive_ext, convert_archive
+from .cache import ConversionCache
+from .html_parser import (convert_html, DEFAULT_RULES, TRANSLATABLE_ATTRS,
+                          PARSER_BACKENDS, DEFAULT_BACKEND, BlockSegmenter)
+from .translation_memory import TranslationMemory
+from .watcher import DirectoryWatcher
+
+HTML_EXTENSIONS = ('.html', '.htm')
 
 
 def parse_arguments():
     parser = ArgumentParser(
         description='Converts a HTML file into XLIFF 1.2'
     )
-    parser.add_argument('path', nargs=1, help='Path to a HTML file')
+    parser.add_argument('path', nargs='*',
+                        help='Path to a HTML file or a .zip/.tar(.gz) archive')
     parser.add_argument('-o', '--output',
-                        help='Output filename (default: <scource_filename>.xlf)',
+                        help='Output filename (default: <scource_filename>.xlf '
+                             'or <archive_name>_xliff.<ext> for archives). '
+                             'In watch mode: output directory (default: '
+                             'the directory of a HTML file).',
                         required=False)
     parser.add_argument('-d', '--datatype', default='html',
                         help='XLIFF data type (default: "html")')
-    return parser.parse_args()
+    parser.add_argument('--cache-dir', required=False,
+                        help='Directory for caching conversion results')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Max. cache size in MiB (default: 256)')
+    parser.add_argument('--tm', required=False,
+                        help='Translation memory database for pre-filling exact matches')
+    parser.add_argument('-t', '--target-language', required=False,
+                        help='Target language code (required with --tm)')
+    parser.add_argument('-a', '--translatable-attr', action='append', default=[],
+                        help='Additional translatable tag attribute, e.g. "title". '
+                             'Can be used several times.')
+    parser.add_argument('-b', '--backend', choices=sorted(PARSER_BACKENDS),
+                        default=DEFAULT_BACKEND,
+                        help='HTML parser backend (default: "{}")'.format(DEFAULT_BACKEND))
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='The number of worker processes for converting '
+                             'archives (default: 1)')
+    parser.add_argument('-w', '--watch', metavar='DIR', required=False,
+                        help='Watch a directory and convert changed HTML files')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='Polling interval in seconds in watch mode (default: 0.5)')
+    args = parser.parse_args()
+    if (args.output and not is_archive(args.output) and
+            any(is_archive(path) for path in args.path)):
+        parser.error('--output must be a .zip or .tar(.gz) archive for archive input')
+    if not (args.path or args.watch):
+        parser.error('either path or --watch is required')
+    if args.path and args.watch:
+        parser.error('path cannot be used with --watch')
+    if args.output and len(args.path) > 1:
+        parser.error('--output cannot be used with multiple input files')
+    if args.tm and not args.target_language:
+        parser.error('--target-language is required with --tm')
+    if args.tm and args.cache_dir:
+        parser.error('--cache-dir cannot be used with --tm')
+    if args.jobs > 1 and (args.cache_dir or args.tm):
+        parser.error('--cache-dir and --tm cannot be used with --jobs')
+    return args
+
+
+def convert_member(name, data, datatype='html', cache=None, tm=None,
+                   target_language=None, rules=DEFAULT_RULES, backend=DEFAULT_BACKEND):
+    """
+    Convert a HTML file from an archive
+
+    :param name: archive member name
+    :type name: str
+    :param data: HTML document
+    :type data: bytes
+    :return: ``(name, xliff)`` tuple or ``None`` if the member
+        is not a HTML file
+    :rtype: tuple
+    """
+    base, ext = posixpath.splitext(name)
+    if ext.lower() not in HTML_EXTENSIONS:
+        return None
+    xliff = convert_html(data, posixpath.basename(name), datatype, cache,
+                         tm, target_language, rules, backend)
+    return base + '.xlf', xliff
+
+
+def watch(watcher, output_dir=None, interval=0.5, **kwargs):
+    """
+    Convert HTML files in a watched directory when they change
+
+    Segmentation results for unchanged blocks of text are reused
+    from the previous conversion of the same file.
+
+    :param watcher: directory watcher
+    :type watcher: xliff_converter.watcher.DirectoryWatcher
+    :param output_dir: output directory. If ``None``, XLIFF files are saved
+        next to HTML files.
+    :type output_dir: str
+    :param interval: polling interval in seconds
+    :type interval: float
+    :param kwargs: additional arguments for ``convert_html()``
+    """
+    segmenters = {}
+    while True:
+        changed, removed = watcher.poll()
+        for path in removed:
+            segmenters.pop(path, None)
+        for path in changed:
+            start_time = time.time()
+            html_filename = os.path.basename(path)
+            xliff_dir = os.path.dirname(path)
+            if output_dir is not None:
+                xliff_dir = os.path.join(
+                    output_dir, os.path.relpath(xliff_dir, watcher.directory)
+                )
+            xliff_filename = os.path.join(
+                xliff_dir, os.path.splitext(html_filename)[0] + '.xlf'
+            )
+            segmenter = segmenters.setdefault(path, BlockSegmenter())
+            try:
+                with open(path, 'rb') as fo:
+                    html = fo.read()
+                xliff = convert_html(html, html_filename, segmenter=segmenter, **kwargs)
+                os.makedirs(xliff_dir, exist_ok=True)
+                with open(xliff_filename, 'wb') as fo:
+                    fo.write(xliff)
+            except Exception as exc:
+                print('{}: conversion failed: {}'.format(path, exc))
+                continue
+            print('{} -> {} ({:.0f} ms)'.format(
+                path, xliff_filename, (time.time() - start_time) * 1000
+            ))
+        time.sleep(interval)
 
 
 def main():
     print('Converting HTML to XLIFF 1.2...')
     args = parse_arguments()
-    with open(args.path[0], 'rb') as fo:
-        html = fo.read()
-    html_filename = os.path.basename(args.path[0])
-    xliff = convert_html(html, html_filename, args.datatype)
-    if args.output:
-        xliff_filename = args.output
-    else:
-        xliff_filename = os.path.splitext(html_filename)[0] + '.xlf'
-    with open(xliff_filename, 'wb') as fo:
-        fo.write(xliff)
+    cache = None
+    if args.cache_dir:
+        cache = ConversionCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    rules = DEFAULT_RULES
+    if args.translatable_attr:
+        translatable_attrs = dict(TRANSLATABLE_ATTRS)
+        translatable_attrs['*'] = (translatable_attrs.get('*', ()) +
+                                   tuple(args.translatable_attr))
+        rules = DEFAULT_RULES._replace(translatable_attrs=translatable_attrs)
+    tm = None
+    if args.tm:
+        tm = TranslationMemory(args.tm)
+    if args.watch:
+        print('Watching {} for changes. Press Ctrl+C to stop.'.format(args.watch))
+        try:
+            watch(DirectoryWatcher(args.watch, HTML_EXTENSIONS), args.output,
+                  args.interval, datatype=args.datatype, cache=cache, tm=tm,
+                  target_language=args.target_language, rules=rules,
+                  backend=args.backend)
+        except KeyboardInterrupt:
+            pass
+    failed = 0
+    for path in args.path:
+        if is_archive(path):
+            base, ext = split_archive_ext(os.path.basename(path))
+            convert = partial(convert_member, datatype=args.datatype,
+                              cache=cache, tm=tm,
+                              target_language=args.target_language,
+                              rules=rules, backend=args.backend)
+            result = convert_archive(path, args.output or base + '_xliff' + ext,
+                                     convert, args.jobs)
+            for name, error in result.errors:
+                print('{}:{}: {}'.format(path, name, error))
+            print('{}: {} files converted, {} failed'.format(
+                path, result.converted, len(result.errors)
+            ))
+            failed += len(result.errors)
+            continue
+        with open(path, 'rb') as fo:
+            html = fo.read()
+        html_filename = os.path.basename(path)
+        xliff = convert_html(html, html_filename, args.datatype, cache,
+                             tm, args.target_language, rules, args.backend)
+        if args.output:
+            xliff_filename = args.output
+        else:
+            xliff_filename = os.path.splitext(html_filename)[0] + '.xlf'
+        with open(xliff_filename, 'wb') as fo:
+            fo.write(xliff)
+    if tm is not None:
+        tm.close()
+    if cache is not None:
+        print(cache.stats)
+    if failed:
+        print('Conversion done, {} files failed.'.format(failed))
+        sys.exit(1)
     print('Conversion done.')
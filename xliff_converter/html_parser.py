@@ -8,14 +8,16 @@ and many others.
 """
 
 import re
+import json
 import logging
 import types
+from collections import namedtuple, OrderedDict
 from base64 import b64encode
 from html import escape, unescape
 from html.parser import HTMLParser
 from xml.dom.minidom import Document, parseString
 from nltk.tokenize import sent_tokenize
-from nltk import download
+from nltk import download, __version__ as nltk_version
 # Check if punkt tokenizer is available
 try:
     sent_tokenize('Test.')
@@ -54,6 +56,37 @@ SELF_CLOSING_TAGS = (
 
 IGNORE_BLOCK_TAGS = ('script', 'style')
 
+BREAK_TAGS = ('br',)
+
+PREFORMATTED_TAGS = ('pre',)
+
+# Translatable tag attributes. '*' key defines attributes for all tags.
+TRANSLATABLE_ATTRS = {
+    'meta': ('description', 'keywords', ('http-equiv', 'keywords', 'content')),
+    'img': ('alt',),
+}
+
+ParserRules = namedtuple(
+    'ParserRules',
+    ['inline_tags', 'ignore_block_tags', 'break_tags', 'preformatted_tags',
+     'translatable_attrs']
+)
+
+DEFAULT_RULES = ParserRules(
+    INLINE_TAGS, IGNORE_BLOCK_TAGS, BREAK_TAGS, PREFORMATTED_TAGS,
+    TRANSLATABLE_ATTRS
+)
+
+SOURCE_LANGUAGE = 'en'
+
+# Max. number of compiled parser rules kept in memory
+COMPILED_RULES_CACHE_SIZE = 32
+
+# Version of the conversion output. It must be increased whenever changes
+# in content extraction or segmentation alter generated XLIFF documents,
+# so that cached results of previous versions are not used.
+OUTPUT_VERSION = 2
+
 charset_re = re.compile(rb'<meta[^>]+charset="?([\w-]+)"[^>]*>', re.I)
 whitespace_re = re.compile(r'^\s+$')
 tag_string_re = re.compile(r'^(<[^>]*>)$')
@@ -67,44 +100,44 @@ pre_code_re = re.compile(r'^<pre[^>]*>\s*?<code[^>]*>', re.I)
 class ContentParser(HTMLParser):
     """
     Extracts translatable blocks of text from HTML markup
+
+    Parser rules are compiled into per-tag handler tables on construction,
+    so the number of rules does not affect tag processing speed.
+    Translatable attributes of inline tags inside a block of text
+    are not extracted because they are a part of that block.
+
+    :param rules: parser rules
+    :type rules: ParserRules
     """
-    def __init__(self):
+    # Compiled handler tables cache: (class, serialized rules) -> tables.
+    # Serialized rules are used as keys so that rules objects are not
+    # kept alive and changes in mutable rules are not missed.
+    _compiled_rules = OrderedDict()
+
+    def __init__(self, rules=DEFAULT_RULES):
         super().__init__(convert_charrefs=False)
         self._content_list = []
         self._current_block = ''
         self._ignore_block = False
+        (self._starttag_handlers, self._startendtag_handlers,
+         self._endtag_handlers, self._default_handler) = self._get_handlers(rules)
 
     @property
     def content_list(self):
         return self._content_list
 
     def handle_starttag(self, tag, attrs):
-        if (tag in INLINE_TAGS and self._current_block) or tag == 'pre':
-            self._current_block += self.get_starttag_text()
-        elif tag in IGNORE_BLOCK_TAGS:
-            self._ignore_block = True
-        elif tag == 'br':
-            self._finish_block()
-        elif tag in ('meta', 'img'):
-            self._process_translatable_attrs(attrs)
+        handler = self._starttag_handlers.get(tag, self._default_handler)
+        if handler is not None:
+            handler(self, attrs)
 
     def handle_startendtag(self, tag, attrs):
-        if tag in INLINE_TAGS and self._current_block:
-            self._current_block += self.get_starttag_text()
-        elif tag == 'br':
-            self._finish_block()
-        elif tag in ('meta', 'img'):
-            self._process_translatable_attrs(attrs)
+        handler = self._startendtag_handlers.get(tag, self._default_handler)
+        if handler is not None:
+            handler(self, attrs)
 
     def handle_endtag(self, tag):
-        if tag in INLINE_TAGS or tag == 'pre':
-            self._current_block += '</{}>'.format(tag)
-            if tag == 'pre':
-                self._finish_block()
-        elif tag in IGNORE_BLOCK_TAGS:
-            self._ignore_block = False
-        elif self._current_block:
-            self._finish_block()
+        self._endtag_handlers.get(tag, ContentParser._end_block)(self, tag)
 
     def handle_data(self, data):
         if not self._ignore_block and not whitespace_re.search(data):
@@ -121,24 +154,201 @@ class ContentParser(HTMLParser):
     def error(self, message):
         logging.error(message)
 
+    @classmethod
+    def _get_handlers(cls, rules):
+        key = cls, dump_rules(rules)
+        handlers = cls._compiled_rules.get(key)
+        if handlers is None:
+            handlers = cls._compile_rules(rules)
+            if len(cls._compiled_rules) >= COMPILED_RULES_CACHE_SIZE:
+                cls._compiled_rules.popitem(last=False)
+            cls._compiled_rules[key] = handlers
+        else:
+            cls._compiled_rules.move_to_end(key)
+        return handlers
+
+    @classmethod
+    def _compile_rules(cls, rules):
+        """
+        Compile parser rules into per-tag handler tables
+        """
+        attr_rules = {
+            tag: tuple(compile_attr_rule(rule) for rule in tag_rules)
+            for tag, tag_rules in rules.translatable_attrs.items()
+        }
+        common_attr_rules = attr_rules.pop('*', ())
+        tags = set(rules.inline_tags).union(
+            rules.ignore_block_tags, rules.break_tags,
+            rules.preformatted_tags, attr_rules
+        )
+        starttag_handlers = {}
+        startendtag_handlers = {}
+        endtag_handlers = {}
+        for tag in tags:
+            tag_attr_rules = attr_rules.get(tag, ()) + common_attr_rules
+            starttag_handlers[tag] = cls._make_start_handler(
+                tag, rules, tag_attr_rules, True
+            )
+            startendtag_handlers[tag] = cls._make_start_handler(
+                tag, rules, tag_attr_rules, False
+            )
+            if tag in rules.preformatted_tags:
+                endtag_handlers[tag] = cls._end_preformatted
+            elif tag in rules.inline_tags:
+                endtag_handlers[tag] = cls._end_inline
+            elif tag in rules.ignore_block_tags:
+                endtag_handlers[tag] = cls._end_ignore_block
+        default_handler = None
+        if common_attr_rules:
+            default_handler = cls._make_attrs_handler(common_attr_rules)
+        return starttag_handlers, startendtag_handlers, endtag_handlers, default_handler
+
+    @classmethod
+    def _make_start_handler(cls, tag, rules, attr_rules, is_starttag):
+        if is_starttag and tag in rules.preformatted_tags:
+            return cls._start_preformatted
+        if is_starttag and tag in rules.ignore_block_tags:
+            handler = cls._start_ignore_block
+        elif tag in rules.break_tags:
+            handler = cls._break_block
+        elif attr_rules:
+            handler = cls._make_attrs_handler(attr_rules)
+        else:
+            handler = None
+        if tag in rules.inline_tags:
+            return cls._make_inline_handler(handler)
+        return handler
+
+    @staticmethod
+    def _make_inline_handler(handler):
+        def start_inline(parser, attrs):
+            if parser._current_block:
+                parser._current_block += parser.get_starttag_text()
+            elif handler is not None:
+                handler(parser, attrs)
+        return start_inline
+
+    @staticmethod
+    def _make_attrs_handler(attr_rules):
+        def process_attrs(parser, attrs):
+            parser._process_translatable_attrs(attrs, attr_rules)
+        return process_attrs
+
+    def _start_preformatted(self, attrs):
+        self._current_block += self.get_starttag_text()
+
+    def _start_ignore_block(self, attrs):
+        self._ignore_block = True
+
+    def _break_block(self, attrs):
+        self._finish_block()
+
+    def _end_inline(self, tag):
+        self._current_block += '</{}>'.format(tag)
+
+    def _end_preformatted(self, tag):
+        self._current_block += '</{}>'.format(tag)
+        self._finish_block()
+
+    def _end_ignore_block(self, tag):
+        self._ignore_block = False
+
+    def _end_block(self, tag):
+        if self._current_block:
+            self._finish_block()
+
     def _finish_block(self):
         self._content_list.append(self._current_block.strip(' \r\n'))
         self._current_block = ''
 
-    def _process_translatable_attrs(self, attrs):
+    def _process_translatable_attrs(self, attrs, attr_rules):
         attrs_dict = dict(attrs)
-        if attrs_dict.get('description'):
-            self._current_block += attrs_dict['description']
-            self._finish_block()
-        elif attrs_dict.get('keywords'):
-            self._current_block += attrs_dict['keywords']
-            self._finish_block()
-        elif attrs_dict.get('http-equiv') == 'keywords':
-            self._current_block += attrs_dict['content']
-            self._finish_block()
-        elif attrs_dict.get('alt'):
-            self._current_block += attrs_dict['alt']
-            self._finish_block()
+        for attr, value, content_attr in attr_rules:
+            if value is not None and attrs_dict.get(attr) != value:
+                continue
+            text = attrs_dict.get(content_attr)
+            if text:
+                # Text before the tag is a separate block, otherwise
+                # the joined block would not be found in the document.
+                if self._current_block:
+                    self._finish_block()
+                self._current_block = text
+                self._finish_block()
+
+
+def compile_attr_rule(rule):
+    """
+    Convert a translatable attribute rule into a normalized form
+
+    A rule is either an attribute name whose value is translatable or
+    a ``(attribute, value, content_attribute)`` tuple meaning that
+    ``content_attribute`` is translatable if ``attribute`` equals ``value``.
+
+    :param rule: translatable attribute rule
+    :type rule: str, tuple
+    :return: ``(attribute, value, content_attribute)`` tuple
+    :rtype: tuple
+    """
+    if isinstance(rule, str):
+        return rule, None, rule
+    return tuple(rule)
+
+
+def dump_rules(rules):
+    """
+    Serialize parser rules into a canonical string
+
+    Dictionary keys are sorted, so the result is the same in all
+    processes regardless of dictionary ordering.
+
+    :param rules: parser rules
+    :type rules: ParserRules
+    :return: JSON string
+    :rtype: str
+    """
+    return json.dumps(rules._asdict(), sort_keys=True)
+
+
+def cache_options(rules):
+    """
+    Get conversion options that affect the output for conversion cache keys
+
+    Segmentation depends on NLTK sentence tokenizer, so NLTK version
+    is included.
+
+    :param rules: parser rules
+    :type rules: ParserRules
+    :return: options as strings
+    :rtype: tuple
+    """
+    return str(OUTPUT_VERSION), 'nltk-' + nltk_version, dump_rules(rules)
+
+
+# Content parser backends: name -> ContentParser subclass
+PARSER_BACKENDS = {
+    'html.parser': ContentParser,
+}
+
+DEFAULT_BACKEND = 'html.parser'
+
+
+def get_content_parser(rules=DEFAULT_RULES, backend=DEFAULT_BACKEND):
+    """
+    Create a content parser
+
+    :param rules: parser rules
+    :type rules: ParserRules
+    :param backend: parser backend name from ``PARSER_BACKENDS``
+    :type backend: str
+    :return: content parser
+    :rtype: ContentParser
+    :raises ValueError: on unknown parser backend
+    """
+    try:
+        parser_class = PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError('Unknown parser backend: {}'.format(backend))
+    return parser_class(rules)
 
 
 def detect_encoding(html):
@@ -156,23 +366,79 @@ def detect_encoding(html):
     return None
 
 
-def segment_html(html):
+def segment_block(block):
+    """
+    Split a translatable block of text into segments
+
+    :param block: translatable block
+    :type block: str
+    :return: the list of translatable segments
+    :rtype: list
+    """
+    # Skip <pre><code> blocks
+    if pre_code_re.search(block) is not None:
+        return []
+    return [segment for segment in sent_tokenize(block)
+            if not tag_string_re.search(segment)]
+
+
+class BlockSegmenter:
+    """
+    Splits translatable blocks into segments reusing results
+    for blocks that have not changed since the previous document
+
+    Only the results for the last segmented document are kept.
+    """
+    def __init__(self):
+        self._segments = {}
+
+    def segment(self, blocks):
+        """
+        Split translatable blocks into segments
+
+        :param blocks: translatable blocks
+        :type blocks: list
+        :return: the list of translatable segments
+        :rtype: list
+        """
+        segments = []
+        block_segments = {}
+        for block in blocks:
+            result = block_segments.get(block)
+            if result is None:
+                result = self._segments.get(block)
+                if result is None:
+                    result = segment_block(block)
+                block_segments[block] = result
+            segments.extend(result)
+        self._segments = block_segments
+        return segments
+
+
+def segment_html(html, rules=DEFAULT_RULES, backend=DEFAULT_BACKEND,
+                 segmenter=None):
     """
     Extract translatable segments from a HTML document
 
     :param html: HTML document
     :type html: str
+    :param rules: parser rules
+    :type rules: ParserRules
+    :param backend: parser backend name
+    :type backend: str
+    :param segmenter: optional segmenter that reuses the results
+        for unchanged blocks
+    :type segmenter: BlockSegmenter
     :return: generator of translatable segments
     :rtype: types.GeneratorType
     """
-    parser = ContentParser()
+    parser = get_content_parser(rules, backend)
     parser.feed(html)
+    if segmenter is not None:
+        yield from segmenter.segment(parser.content_list)
+        return
     for item in parser.content_list:
-        # Skip <pre><code> blocks
-        if pre_code_re.search(item) is None:
-            for segment in sent_tokenize(item):
-                if not tag_string_re.search(segment):
-                    yield segment
+        yield from segment_block(item)
 
 
 def find_tag(tag_name, tags_stack):
@@ -272,7 +538,23 @@ def create_skeleton(segments, html):
     return html
 
 
-def create_xliff(segments, skeleton, filename, datatype='html'):
+def append_segment(element, segment):
+    """
+    Append a translation segment with inline tags to a XLIFF element
+
+    :param element: ``<source>`` or ``<target>`` element
+    :type element: xml.dom.minidom.Element
+    :param segment: translation segment
+    :type segment: str
+    """
+    tmp_seg = '<src-root>{}</src-root>'.format(add_t_tags(unescape(segment)))
+    tmp_doc = parseString(tmp_seg)
+    for node in tmp_doc.firstChild.childNodes:
+        element.appendChild(node.cloneNode(True))
+
+
+def create_xliff(segments, skeleton, filename, datatype='html',
+                 translations=None, target_language=None):
     """
     Create XLIFF 1.2 file
 
@@ -284,6 +566,11 @@ def create_xliff(segments, skeleton, filename, datatype='html'):
     :type filename: str
     :param datatype: document datatype (html)
     :type datatype: str
+    :param translations: optional translations of ``segments``
+        with ``None`` for untranslated segments
+    :type translations: list
+    :param target_language: target language code
+    :type target_language: str
     :return: XLIFF file contents
     :rtype: bytes
     """
@@ -294,7 +581,9 @@ def create_xliff(segments, skeleton, filename, datatype='html'):
     file = doc.createElement('file')
     file.setAttribute('original', filename)
     file.setAttribute('datatype', datatype)
-    file.setAttribute('source-language', 'en')
+    file.setAttribute('source-language', SOURCE_LANGUAGE)
+    if target_language:
+        file.setAttribute('target-language', target_language)
     xliff.appendChild(file)
     header = doc.createElement('header')
     file.appendChild(header)
@@ -313,21 +602,27 @@ def create_xliff(segments, skeleton, filename, datatype='html'):
     internal_file.appendChild(skl_node)
     body = doc.createElement('body')
     file.appendChild(body)
-    for id_, seg in enumerate(segments, 1):
+    if translations is None:
+        translations = [None] * len(segments)
+    for id_, (seg, trans) in enumerate(zip(segments, translations), 1):
         trans_unit = doc.createElement('trans-unit')
         trans_unit.setAttribute('id', str(id_))
         trans_unit.setAttribute('xml:space', 'preserve')
         body.appendChild(trans_unit)
         source = doc.createElement('source')
         trans_unit.appendChild(source)
-        tmp_seg = '<src-root>{}</src-root>'.format(add_t_tags(unescape(seg)))
-        tmp_doc = parseString(tmp_seg)
-        for node in tmp_doc.firstChild.childNodes:
-            source.appendChild(node.cloneNode(True))
+        append_segment(source, seg)
+        if trans is not None:
+            target = doc.createElement('target')
+            target.setAttribute('state', 'translated')
+            trans_unit.appendChild(target)
+            append_segment(target, trans)
     return doc.toxml(encoding='utf-8')
 
 
-def convert_html(html, filename='index.html', datatype='html'):
+def convert_html(html, filename='index.html', datatype='html', cache=None,
+                 tm=None, target_language=None, rules=DEFAULT_RULES,
+                 backend=DEFAULT_BACKEND, segmenter=None):
     """
     Convert a HTML document into XLIFF 1.2 translatable format
 
@@ -337,14 +632,48 @@ def convert_html(html, filename='index.html', datatype='html'):
     :type filename: str
     :param datatype: document datatype (html)
     :type datatype: str
+    :param cache: optional conversion cache. If the same document
+        has already been converted, the cached XLIFF is returned.
+    :type cache: xliff_converter.cache.ConversionCache
+    :param tm: optional translation memory for pre-filling exact matches.
+        The conversion cache is not used with a translation memory
+        because TM contents may change between runs.
+    :type tm: xliff_converter.translation_memory.TranslationMemory
+    :param target_language: target language code. Required for using
+        a translation memory.
+    :type target_language: str
+    :param rules: parser rules
+    :type rules: ParserRules
+    :param backend: parser backend name. All backends produce
+        the same result.
+    :type backend: str
+    :param segmenter: optional segmenter that reuses the results
+        for blocks that have not changed since the previous conversion
+    :type segmenter: BlockSegmenter
     :return: XLIFF 1.2 document
     :rtype: bytes
     """
+    if tm is not None:
+        if not target_language:
+            raise ValueError('Target language is required for using a translation memory!')
+        cache = None
+    if cache is not None:
+        cache_key = cache.make_key(html, filename, datatype, *cache_options(rules))
+        xliff = cache.get(cache_key)
+        if xliff is not None:
+            return xliff
     if isinstance(html, bytes):
         enc = detect_encoding(html)
         if enc is None:
             enc = 'utf-8'
         html = html.decode(enc)
-    segments = list(segment_html(html))
+    segments = list(segment_html(html, rules, backend, segmenter))
     skeleton = create_skeleton(segments, html)
-    return create_xliff(segments, skeleton, filename, datatype)
+    translations = None
+    if tm is not None:
+        translations = tm.lookup(segments, SOURCE_LANGUAGE, target_language)
+    xliff = create_xliff(segments, skeleton, filename, datatype,
+                         translations, target_language)
+    if cache is not None:
+        cache.put(cache_key, xliff)
+    return xliff
@@ -15,7 +15,8 @@ __all__ = ['rebuild_html']
 
 Translation = namedtuple(
     'Translation',
-    ['filename', 'target_language', 'skeleton', 'segments']
+    ['filename', 'target_language', 'skeleton', 'segments',
+     'source_language', 'sources', 'has_target']
 )
 HtmlDocument = namedtuple('HtmlDocument', ['filename', 'html'])
 
@@ -54,7 +55,9 @@ def extract_translation(xliff, strict=True):
     :param strict: if ``True`` exception will be raised on a missing translation.
         If ``False`` source text will be used instead of a missing translation.
     :type strict: bool
-    :return: extracted translation data
+    :return: extracted translation data. ``sources`` contains source texts
+        of ``segments``, ``has_target`` contains ``True`` for segments
+        that have ``<target>`` elements.
     :rtype: Translation
     :raises InvalidXliffError: if a segment is not translated
         in strict extraction mode, or if XLIFF is missing ``target-language``
@@ -63,6 +66,7 @@ def extract_translation(xliff, strict=True):
     doc = parseString(xliff)
     file_elem = doc.getElementsByTagName('file')[0]
     filename = file_elem.getAttribute('original')
+    source_language = file_elem.getAttribute('source-language')
     target_language = file_elem.getAttribute('target-language')
     if not target_language:
         raise InvalidXliffError('XLIFF has no target language specified!')
@@ -74,7 +78,10 @@ def extract_translation(xliff, strict=True):
     ).decode('utf-8')
     trans_units = doc.getElementsByTagName('trans-unit')
     segments = []
+    sources = []
+    has_target = []
     for tu in trans_units:
+        source_elem = tu.getElementsByTagName('source')[0]
         try:
             trans_elem = tu.getElementsByTagName('target')[0]
         except IndexError:
@@ -84,9 +91,14 @@ def extract_translation(xliff, strict=True):
                         tu.getAttribute('id')
                     )
                 )
-            trans_elem = tu.getElementsByTagName('source')[0]
+            trans_elem = source_elem
+            has_target.append(False)
+        else:
+            has_target.append(True)
+        sources.append(extract_text(source_elem))
         segments.append(extract_text(trans_elem))
-    return Translation(filename, target_language, skeleton, segments)
+    return Translation(filename, target_language, skeleton, segments,
+                       source_language, sources, has_target)
 
 
 def restore_skeleton(skeleton, segments):
@@ -148,7 +160,18 @@ def rebuild_html(xliff, strict=True):
     :return: translated HTML document
     :rtype: HtmlDocument
     """
-    translation = extract_translation(xliff, strict)
+    return build_html(extract_translation(xliff, strict))
+
+
+def build_html(translation):
+    """
+    Build translated HTML from extracted translation data
+
+    :param translation: translation data
+    :type translation: Translation
+    :return: translated HTML document
+    :rtype: HtmlDocument
+    """
     html = restore_skeleton(translation.skeleton, translation.segments)
     html = set_language(html, translation.target_language)
     return HtmlDocument(translation.filename, html)
@@ -0,0 +1,161 @@
+"""
+Translation memory module
+
+Provides a local translation memory (TM) stored in a SQLite database.
+The TM is populated from translated XLIFF documents and is used
+for pre-filling exact matches when converting HTML documents to XLIFF.
+"""
+
+import hashlib
+import sqlite3
+from html import unescape
+from .html_rebuilder import extract_translation
+
+__all__ = ['TranslationMemory', 'normalize_segment']
+
+# Max. number of SQL query parameters that is safe for all SQLite versions
+QUERY_BATCH_SIZE = 500
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS segments (
+    hash TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (hash, source_language, target_language)
+)
+'''
+
+
+def normalize_segment(segment):
+    """
+    Normalize a translation segment for matching
+
+    HTML entities are unescaped and whitespace sequences are collapsed.
+
+    :param segment: translation segment
+    :type segment: str
+    :return: normalized segment
+    :rtype: str
+    """
+    return ' '.join(unescape(segment).split())
+
+
+def segment_hash(segment):
+    """
+    Get a hash of a normalized translation segment
+
+    :param segment: translation segment
+    :type segment: str
+    :return: segment hash
+    :rtype: str
+    """
+    return hashlib.sha1(normalize_segment(segment).encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Translation memory stored in a SQLite database
+
+    :param path: path to a database file. It is created if it does not exist.
+    :type path: str
+    """
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def add(self, pairs, source_language, target_language):
+        """
+        Add translated segments to the TM
+
+        Existing translations of the same source segments are replaced.
+
+        :param pairs: iterable of (source, target) segment pairs
+        :type pairs: collections.abc.Iterable
+        :param source_language: source language code
+        :type source_language: str
+        :param target_language: target language code
+        :type target_language: str
+        """
+        source_language = source_language.lower()
+        target_language = target_language.lower()
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?)',
+                ((segment_hash(source), source_language, target_language,
+                  source, target) for source, target in pairs)
+            )
+
+    def import_xliff(self, xliff):
+        """
+        Add translated segments from a XLIFF 1.2 document to the TM
+
+        Segments without ``<target>`` elements or with empty targets
+        are skipped. Targets that are identical to sources are kept.
+
+        :param xliff: translated XLIFF document
+        :type xliff: str
+        :return: the number of added segments
+        :rtype: int
+        """
+        return self.import_translation(extract_translation(xliff, strict=False))
+
+    def import_translation(self, translation):
+        """
+        Add translated segments from extracted translation data to the TM
+
+        Segments without ``<target>`` elements or with empty targets
+        are skipped.
+
+        :param translation: translation data
+        :type translation: xliff_converter.html_rebuilder.Translation
+        :return: the number of added segments
+        :rtype: int
+        """
+        pairs = [(source, target) for source, target, has_target
+                 in zip(translation.sources, translation.segments,
+                        translation.has_target)
+                 if has_target and target.strip()]
+        self.add(pairs, translation.source_language, translation.target_language)
+        return len(pairs)
+
+    def lookup(self, segments, source_language, target_language):
+        """
+        Find exact matches for translation segments
+
+        Segments are looked up in batches so that a document costs
+        only a few queries.
+
+        :param segments: translation segments
+        :type segments: list
+        :param source_language: source language code
+        :type source_language: str
+        :param target_language: target language code
+        :type target_language: str
+        :return: the list of translations for ``segments``
+            with ``None`` for segments without a match
+        :rtype: list
+        """
+        hashes = [segment_hash(seg) for seg in segments]
+        unique_hashes = list(set(hashes))
+        matches = {}
+        for i in range(0, len(unique_hashes), QUERY_BATCH_SIZE):
+            batch = unique_hashes[i:i + QUERY_BATCH_SIZE]
+            cursor = self._connection.execute(
+                'SELECT hash, target FROM segments '
+                'WHERE source_language = ? AND target_language = ? '
+                'AND hash IN ({})'.format(', '.join('?' * len(batch))),
+                [source_language.lower(), target_language.lower()] + batch
+            )
+            matches.update(cursor)
+        return [matches.get(hash_) for hash_ in hashes]
@@ -0,0 +1,66 @@
+"""
+Directory watcher module
+
+Detects changed files in a directory by polling their modification times
+and sizes, so no OS-specific file notification API is required.
+"""
+
+import os
+
+__all__ = ['DirectoryWatcher']
+
+
+class DirectoryWatcher:
+    """
+    Watches files with given extensions in a directory and its subdirectories
+
+    :param directory: watched directory
+    :type directory: str
+    :param extensions: watched file extensions, e.g. ``('.html',)``
+    :type extensions: tuple
+    """
+    def __init__(self, directory, extensions):
+        self._directory = directory
+        self._extensions = tuple(ext.lower() for ext in extensions)
+        self._files = {}
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def scan(self):
+        """
+        Get the current state of watched files
+
+        :return: ``{path: (mtime_ns, size)}`` dictionary
+        :rtype: dict
+        """
+        files = {}
+        for dirpath, _, filenames in os.walk(self._directory):
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in self._extensions:
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # The file has been removed while scanning
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def poll(self):
+        """
+        Find files that have been added, modified or removed since the last poll
+
+        On the first call all files are reported as added.
+
+        :return: ``(changed, removed)`` tuple of sorted lists of paths
+        :rtype: tuple
+        """
+        files = self.scan()
+        changed = sorted(path for path, state in files.items()
+                         if self._files.get(path) != state)
+        removed = sorted(path for path in self._files if path not in files)
+        self._files = files
+        return changed, removed
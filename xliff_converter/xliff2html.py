@@ -2,37 +2,156 @@
 Converts a translated XLIFF 1.2 document back to HTML
 """
 
+import os
+import sys
+import posixpath
 from argparse import ArgumentParser
-from .html_rebuilder import rebuild_html
+from functools import partial
+from .archives import (is_archive, iter_archive, split_archive_ext,
+                       convert_archive, member_path)
+from .html_rebuilder import build_html, extract_translation
+from .translation_memory import TranslationMemory
+from .xliff_validator import validate_xliff
+
+XLIFF_EXTENSIONS = ('.xlf', '.xliff')
 
 
 def parse_arguments():
     parser = ArgumentParser(
         description='Convert a XLIFF 1.2 document back to HTML'
     )
-    parser.add_argument('path', nargs=1, help='Path to a XLIFF file')
+    parser.add_argument('path', nargs='+',
+                        help='Path to a XLIFF file or a .zip/.tar(.gz) archive')
     parser.add_argument(
         '-o', '--output', required=False,
-        help='Output filename (default: <source filename>_<ll-CC>.<ext>)'
+        help='Output filename (default: <source filename>_<ll-CC>.<ext> '
+             'or <archive_name>_html.<ext> for archives)'
     )
     parser.add_argument(
         '-p', '--allow-partial',
         action='store_true', default=False,
         help='Allow to convert a partially translated XLIFF'
     )
-    return parser.parse_args()
+    parser.add_argument(
+        '-c', '--check',
+        action='store_true', default=False,
+        help='Only validate XLIFF files and report found issues'
+    )
+    parser.add_argument(
+        '--tm', required=False,
+        help='Add translations to a translation memory database'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='The number of worker processes for converting archives (default: 1)'
+    )
+    args = parser.parse_args()
+    if (args.output and not is_archive(args.output) and
+            any(is_archive(path) for path in args.path)):
+        parser.error('--output must be a .zip or .tar(.gz) archive for archive input')
+    if args.output and len(args.path) > 1:
+        parser.error('--output cannot be used with multiple input files')
+    if args.jobs > 1 and args.tm:
+        parser.error('--tm cannot be used with --jobs')
+    return args
+
+
+def check(paths, strict):
+    """
+    Validate XLIFF files and print found issues
+
+    :param paths: paths to XLIFF files
+    :type paths: list
+    :param strict: if ``True`` missing translations are reported as issues
+    :type strict: bool
+    :return: ``True`` if all files are valid
+    :rtype: bool
+    """
+    is_valid = True
+    for path in paths:
+        if is_archive(path):
+            results = ((path + ':' + name, validate_xliff(data, strict))
+                       for name, data in iter_archive(path) if is_xliff(name))
+        else:
+            with open(path, 'rb') as fo:
+                results = [(path, validate_xliff(fo, strict))]
+        for name, issues in results:
+            for issue in issues:
+                unit = ' [trans-unit {}]'.format(issue.unit_id) if issue.unit_id else ''
+                print('{}:{}:{} {}'.format(name, issue.line, unit, issue.message))
+            if issues:
+                is_valid = False
+    return is_valid
+
+
+def is_xliff(name):
+    return posixpath.splitext(name)[1].lower() in XLIFF_EXTENSIONS
+
+
+def convert_member(name, data, strict=True, tm=None):
+    """
+    Rebuild a HTML file from a XLIFF file in an archive
+
+    :param name: archive member name
+    :type name: str
+    :param data: XLIFF document
+    :type data: bytes
+    :param strict: if ``False`` partially translated XLIFF is accepted
+    :type strict: bool
+    :param tm: optional translation memory for adding translations
+    :type tm: xliff_converter.translation_memory.TranslationMemory
+    :return: ``(name, html)`` tuple or ``None`` if the member
+        is not a XLIFF file
+    :rtype: tuple
+    """
+    if not is_xliff(name):
+        return None
+    translation = extract_translation(data.decode('utf-8'), strict)
+    html_document = build_html(translation)
+    if tm is not None:
+        tm.import_translation(translation)
+    return member_path(name, html_document.filename), html_document.html.encode('utf-8')
 
 
 def main():
-    print('Converting XLIFF 1.2 to HTML...')
     args = parse_arguments()
-    with open(args.path[0], 'r', encoding='utf-8') as fo:
-        xliff = fo.read()
-    html_document = rebuild_html(xliff, not args.allow_partial)
-    if args.output:
-        html_filename = args.output
-    else:
-        html_filename = html_document.filename
-    with open(html_filename, 'w', encoding='utf-8') as fo:
-        fo.write(html_document.html)
+    if args.check:
+        if not check(args.path, not args.allow_partial):
+            sys.exit(1)
+        return
+    print('Converting XLIFF 1.2 to HTML...')
+    tm = None
+    if args.tm:
+        tm = TranslationMemory(args.tm)
+    failed = 0
+    for path in args.path:
+        if is_archive(path):
+            base, ext = split_archive_ext(os.path.basename(path))
+            convert = partial(convert_member, strict=not args.allow_partial, tm=tm)
+            result = convert_archive(path, args.output or base + '_html' + ext,
+                                     convert, args.jobs)
+            for name, error in result.errors:
+                print('{}:{}: {}'.format(path, name, error))
+            print('{}: {} files converted, {} failed'.format(
+                path, result.converted, len(result.errors)
+            ))
+            failed += len(result.errors)
+            continue
+        with open(path, 'r', encoding='utf-8') as fo:
+            xliff = fo.read()
+        translation = extract_translation(xliff, not args.allow_partial)
+        html_document = build_html(translation)
+        if args.output:
+            html_filename = args.output
+        else:
+            html_filename = html_document.filename
+        with open(html_filename, 'w', encoding='utf-8') as fo:
+            fo.write(html_document.html)
+        if tm is not None:
+            tm.import_translation(translation)
+    if tm is not None:
+        tm.close()
+    if failed:
+        print('Conversion done, {} files failed.'.format(failed))
+        sys.exit(1)
     print('Conversion done.')
@@ -0,0 +1,364 @@
+"""
+Indexed XLIFF document module
+
+Provides random access to trans-units of a large XLIFF 1.2 document.
+The document is scanned once to build an index of byte offsets
+of ``<trans-unit>`` elements, and then individual units and the document
+skeleton are loaded on demand.
+"""
+
+import os
+import re
+import json
+import shutil
+import tempfile
+from base64 import b64decode
+from xml.dom import expatbuilder
+from xml.parsers import expat
+from .html_rebuilder import InvalidXliffError, extract_text
+
+__all__ = ['XliffDocument']
+
+CHUNK_SIZE = 64 * 1024
+INDEX_VERSION = 1
+
+start_tag_re = re.compile(rb'''<[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>''')
+
+
+class _IndexBuilder:
+    """
+    Collects byte offsets of XLIFF elements while the document is parsed
+    """
+    def __init__(self):
+        self.encoding = 'utf-8'
+        self.file_attrs = {}
+        self.skeleton_span = None
+        self.unit_ids = []
+        self.unit_spans = {}
+        self._window = b''
+        self._window_start = 0
+        self._starts = []
+        self._events = 0
+        self._unresolved = []
+        self._seen_ids = set()
+        self._parser = expat.ParserCreate()
+        self._parser.XmlDeclHandler = self._xml_decl
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+
+    def scan(self, fo):
+        prev_chunk = b''
+        offset = 0
+        while True:
+            chunk = fo.read(CHUNK_SIZE)
+            # Element end offsets are looked up in the current and the previous
+            # chunks because an end tag may be split between them.
+            self._window = prev_chunk + chunk
+            self._window_start = offset - len(prev_chunk)
+            try:
+                self._parser.Parse(chunk, not chunk)
+            except expat.ExpatError as exc:
+                raise InvalidXliffError('Malformed XLIFF: {}'.format(exc))
+            if not chunk:
+                break
+            prev_chunk = chunk
+            offset += len(chunk)
+        for name, id_, start, pos, is_empty in self._unresolved:
+            fo.seek(start)
+            data = fo.read(pos - start + 4096)
+            end = find_element_end(data, start, start, pos, is_empty)
+            if end < 0:
+                raise InvalidXliffError('Malformed XLIFF: unexpected end of file')
+            self._add_span(name, id_, start, end)
+
+    def _xml_decl(self, version, encoding, standalone):
+        if encoding:
+            self.encoding = encoding
+
+    def _start_element(self, name, attrs):
+        self._events += 1
+        if name == 'trans-unit':
+            id_ = attrs.get('id', '')
+            if id_ in self._seen_ids:
+                raise InvalidXliffError('Duplicate trans-unit id: {}'.format(id_))
+            self._seen_ids.add(id_)
+            self._starts.append((name, id_, self._parser.CurrentByteIndex, self._events))
+        elif name == 'internal_file':
+            self._starts.append((name, None, self._parser.CurrentByteIndex, self._events))
+        elif name == 'file' and not self.file_attrs:
+            self.file_attrs = attrs
+
+    def _end_element(self, name):
+        self._events += 1
+        if not self._starts or self._starts[-1][0] != name:
+            return
+        _, id_, start, start_event = self._starts.pop()
+        if name == 'trans-unit':
+            self.unit_ids.append(id_)
+        pos = self._parser.CurrentByteIndex
+        # The element may be empty (<trans-unit/>) only if there were no
+        # other elements between its start and end.
+        is_empty = start_event == self._events - 1
+        end = find_element_end(self._window, self._window_start, start, pos, is_empty)
+        if end < 0:
+            # The tag is longer than the window, look it up in the file later
+            self._unresolved.append((name, id_, start, pos, is_empty))
+            return
+        self._add_span(name, id_, start, end)
+
+    def _add_span(self, name, id_, start, end):
+        if name == 'trans-unit':
+            self.unit_spans[id_] = (start, end)
+        else:
+            self.skeleton_span = (start, end)
+
+
+def find_element_end(data, data_start, start, pos, is_empty):
+    """
+    Find the end offset of an element
+
+    :param data: a piece of XLIFF document
+    :type data: bytes
+    :param data_start: the offset of ``data`` in the document
+    :type data_start: int
+    :param start: element start offset
+    :type start: int
+    :param pos: parser position at the element end event
+    :type pos: int
+    :param is_empty: ``True`` if the element can be an empty element
+    :type is_empty: bool
+    :return: element end offset or ``-1`` if it is not found in ``data``
+    :rtype: int
+    """
+    if is_empty:
+        if start < data_start:
+            return -1
+        match = start_tag_re.match(data, start - data_start)
+        if match is None:
+            return -1
+        if match.group().endswith(b'/>'):
+            return data_start + match.end()
+    # The parser position is at the beginning of the end tag
+    if pos < data_start:
+        return -1
+    gt_pos = data.find(b'>', pos - data_start)
+    if gt_pos < 0:
+        return -1
+    return data_start + gt_pos + 1
+
+
+class XliffDocument:
+    """
+    XLIFF 1.2 document with lazily loaded trans-units
+
+    The index of trans-units can be persisted in a sidecar file.
+    It is re-created if the XLIFF file has changed. After updating
+    trans-units the index is saved on ``save_index()`` or ``close()``
+    call or on exiting a ``with`` block.
+
+    :param path: path to a XLIFF file
+    :type path: str
+    :param index_path: optional path to an index sidecar file
+    :type index_path: str
+    :raises InvalidXliffError: if the document is not well-formed
+        or contains duplicate trans-unit ids
+    """
+    def __init__(self, path, index_path=None):
+        self._path = path
+        self._index_path = index_path
+        self._skeleton = None
+        self._index_changed = False
+        if index_path is None or not self._load_index():
+            with open(path, 'rb') as fo:
+                builder = _IndexBuilder()
+                builder.scan(fo)
+            self._encoding = builder.encoding
+            self._file_attrs = builder.file_attrs
+            self._skeleton_span = builder.skeleton_span
+            self._unit_ids = builder.unit_ids
+            self._unit_spans = builder.unit_spans
+            self._index_changed = True
+            self.save_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._unit_ids)
+
+    def __contains__(self, id_):
+        return id_ in self._unit_spans
+
+    def __iter__(self):
+        return iter(self._unit_ids)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def filename(self):
+        return self._file_attrs.get('original', '')
+
+    @property
+    def source_language(self):
+        return self._file_attrs.get('source-language', '')
+
+    @property
+    def target_language(self):
+        return self._file_attrs.get('target-language', '')
+
+    @property
+    def skeleton(self):
+        """
+        Document skeleton
+
+        :raises InvalidXliffError: if the document has no skeleton
+        """
+        if self._skeleton is None:
+            if self._skeleton_span is None:
+                raise InvalidXliffError('XLIFF has no document skeleton!')
+            elem = self._load_element(*self._skeleton_span)
+            self._skeleton = b64decode(
+                elem.firstChild.data.encode('ascii')
+            ).decode('utf-8')
+        return self._skeleton
+
+    def get_unit(self, id_):
+        """
+        Load a trans-unit
+
+        :param id_: trans-unit id
+        :type id_: str
+        :return: ``<trans-unit>`` element
+        :rtype: xml.dom.minidom.Element
+        :raises KeyError: if there is no trans-unit with such id
+        """
+        return self._load_element(*self._unit_spans[id_])
+
+    def get_source(self, id_):
+        """
+        Get the source text of a trans-unit
+
+        :param id_: trans-unit id
+        :type id_: str
+        :return: source text
+        :rtype: str
+        """
+        return extract_text(self.get_unit(id_).getElementsByTagName('source')[0])
+
+    def get_target(self, id_):
+        """
+        Get the translation of a trans-unit
+
+        :param id_: trans-unit id
+        :type id_: str
+        :return: translated text or ``None`` if the unit is not translated
+        :rtype: str
+        """
+        targets = self.get_unit(id_).getElementsByTagName('target')
+        if not targets:
+            return None
+        return extract_text(targets[0])
+
+    def update_unit(self, unit):
+        """
+        Write a modified trans-unit back to the XLIFF file
+
+        Only the bytes of the trans-unit are replaced. If the size
+        of the unit has not changed, the file is updated in place.
+
+        :param unit: ``<trans-unit>`` element returned by ``get_unit()``
+        :type unit: xml.dom.minidom.Element
+        :raises KeyError: if there is no trans-unit with such id
+        """
+        id_ = unit.getAttribute('id')
+        start, end = self._unit_spans[id_]
+        data = unit.toxml().encode(self._encoding)
+        delta = len(data) - (end - start)
+        if delta == 0:
+            with open(self._path, 'r+b') as fo:
+                fo.seek(start)
+                fo.write(data)
+        else:
+            self._splice(start, end, data)
+            self._unit_spans[id_] = (start, end + delta)
+            for other_id, (other_start, other_end) in self._unit_spans.items():
+                if other_start >= end:
+                    self._unit_spans[other_id] = (other_start + delta, other_end + delta)
+            if self._skeleton_span is not None and self._skeleton_span[0] >= end:
+                self._skeleton_span = (self._skeleton_span[0] + delta,
+                                       self._skeleton_span[1] + delta)
+        self._index_changed = True
+
+    def save_index(self):
+        """
+        Save the trans-units index into the sidecar file if it has changed
+        """
+        if self._index_path is None or not self._index_changed:
+            return
+        index = {
+            'version': INDEX_VERSION,
+            'signature': self._file_signature(),
+            'encoding': self._encoding,
+            'file_attrs': self._file_attrs,
+            'skeleton_span': self._skeleton_span,
+            'ids': self._unit_ids,
+            'starts': [self._unit_spans[id_][0] for id_ in self._unit_ids],
+            'ends': [self._unit_spans[id_][1] for id_ in self._unit_ids],
+        }
+        with open(self._index_path, 'w', encoding='utf-8') as fo:
+            json.dump(index, fo, separators=(',', ':'))
+        self._index_changed = False
+
+    def close(self):
+        self.save_index()
+
+    def _load_element(self, start, end):
+        with open(self._path, 'rb') as fo:
+            fo.seek(start)
+            data = fo.read(end - start)
+        doc = expatbuilder.parseString(data.decode(self._encoding), namespaces=False)
+        return doc.documentElement
+
+    def _splice(self, start, end, data):
+        directory = os.path.dirname(os.path.abspath(self._path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out, open(self._path, 'rb') as fo:
+                remaining = start
+                while remaining:
+                    chunk = fo.read(min(remaining, CHUNK_SIZE))
+                    out.write(chunk)
+                    remaining -= len(chunk)
+                out.write(data)
+                fo.seek(end)
+                shutil.copyfileobj(fo, out, CHUNK_SIZE)
+            shutil.copymode(self._path, tmp_path)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _file_signature(self):
+        stat = os.stat(self._path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as fo:
+                index = json.load(fo)
+        except (OSError, ValueError):
+            return False
+        if (index.get('version') != INDEX_VERSION or
+                index.get('signature') != self._file_signature()):
+            return False
+        self._encoding = index['encoding']
+        self._file_attrs = index['file_attrs']
+        self._skeleton_span = index['skeleton_span'] and tuple(index['skeleton_span'])
+        self._unit_ids = index['ids']
+        self._unit_spans = dict(zip(index['ids'], zip(index['starts'], index['ends'])))
+        return True
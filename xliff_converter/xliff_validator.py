@@ -0,0 +1,266 @@
+"""
+XLIFF document validator module
+
+Checks a translated XLIFF 1.2 document generated by ``html_parser.py``
+for problems that prevent rebuilding the translated HTML document.
+The document is streamed through an Expat parser and the skeleton
+is decoded chunk by chunk, so neither the DOM nor the decoded skeleton
+is kept in memory.
+"""
+
+import re
+import codecs
+import binascii
+from base64 import b64decode
+from collections import namedtuple
+from xml.parsers import expat
+
+__all__ = ['validate_xliff']
+
+ValidationIssue = namedtuple('ValidationIssue', ['line', 'unit_id', 'message'])
+
+placeholder_re = re.compile(r'\{\{%(\d+)%\}\}')
+
+CHUNK_SIZE = 64 * 1024
+
+# Max. length of a skeleton placeholder that is kept between decoded chunks
+MAX_PLACEHOLDER_LENGTH = 32
+
+
+class _TransUnit:
+    """
+    Validation state of the current ``<trans-unit>``
+    """
+    def __init__(self, id_, line):
+        self.id = id_
+        self.line = line
+        self.depth = 0
+        self.has_target = False
+        self.target_is_empty = True
+        # Currently open <source> or <target> element and its bpt/ept ids
+        self.container = None
+        self.bpt_ids = {}
+        self.ept_ids = {}
+
+
+class _SkeletonScanner:
+    """
+    Collects placeholder ids from a base64-encoded skeleton
+    that is received in chunks
+
+    :raises ValueError: on invalid base64 or UTF-8 data
+    """
+    def __init__(self):
+        self.ids = set()
+        self._base64 = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._tail = ''
+
+    def feed(self, data):
+        data = self._base64 + ''.join(data.split())
+        # Only complete 4-character groups can be decoded
+        size = len(data) // 4 * 4
+        self._base64 = data[size:]
+        decoded = b64decode(data[:size].encode('ascii'), validate=True)
+        self._scan(self._decoder.decode(decoded))
+
+    def close(self):
+        if self._base64:
+            raise binascii.Error('Incorrect padding')
+        self._scan(self._decoder.decode(b'', True))
+
+    def _scan(self, text):
+        text = self._tail + text
+        end = 0
+        for match in placeholder_re.finditer(text):
+            self.ids.add(match.group(1))
+            end = match.end()
+        # A placeholder may be split between chunks
+        self._tail = text[max(end, len(text) - MAX_PLACEHOLDER_LENGTH):]
+
+
+class XliffValidator:
+    """
+    Collects issues found in a XLIFF document while it is being parsed
+
+    :param strict: if ``True`` missing translations are reported as issues
+    :type strict: bool
+    """
+    def __init__(self, strict=True):
+        self._strict = strict
+        self._issues = []
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._char_data
+        self._file_line = None
+        self._skeleton = None
+        self._skeleton_line = None
+        self._placeholder_ids = None
+        self._unit_ids = set()
+        self._unit = None
+
+    @property
+    def issues(self):
+        return self._issues
+
+    def feed(self, data, is_final=False):
+        """
+        Feed a chunk of XLIFF document to the validator
+
+        :param data: a chunk of XLIFF document
+        :type data: str, bytes
+        :param is_final: ``True`` if this is the last chunk
+        :type is_final: bool
+        :return: ``False`` if the document is not well-formed
+            and parsing has been stopped
+        :rtype: bool
+        """
+        try:
+            self._parser.Parse(data, is_final)
+        except expat.ExpatError as exc:
+            self._add_issue(exc.lineno, None,
+                            'Malformed XML: {}'.format(expat.ErrorString(exc.code)))
+            return False
+        return True
+
+    def _add_issue(self, line, unit_id, message):
+        self._issues.append(ValidationIssue(line, unit_id, message))
+
+    def _start_element(self, name, attrs):
+        line = self._parser.CurrentLineNumber
+        unit = self._unit
+        if unit is not None:
+            unit.depth += 1
+            if unit.container is not None:
+                if unit.container == 'target':
+                    unit.target_is_empty = False
+                if name in ('bpt', 'ept'):
+                    ids = unit.bpt_ids if name == 'bpt' else unit.ept_ids
+                    ids[attrs.get('id')] = line
+            elif unit.depth == 1 and name in ('source', 'target'):
+                unit.container = name
+                unit.bpt_ids = {}
+                unit.ept_ids = {}
+                if name == 'target':
+                    unit.has_target = True
+        elif name == 'trans-unit':
+            id_ = attrs.get('id')
+            if not id_:
+                self._add_issue(line, None, 'Trans-unit has no id')
+            elif id_ in self._unit_ids:
+                self._add_issue(line, id_, 'Duplicate trans-unit id')
+            else:
+                self._unit_ids.add(id_)
+            self._unit = _TransUnit(id_, line)
+        elif name == 'internal_file':
+            self._skeleton = _SkeletonScanner()
+            self._skeleton_line = line
+        elif name == 'file':
+            self._file_line = line
+            self._skeleton_line = None
+            self._placeholder_ids = None
+            self._unit_ids = set()
+            if not attrs.get('target-language'):
+                self._add_issue(line, None, 'XLIFF has no target language specified')
+
+    def _end_element(self, name):
+        unit = self._unit
+        if unit is not None:
+            if unit.depth == 0:
+                self._check_unit(unit)
+                self._unit = None
+                return
+            if unit.depth == 1 and name == unit.container:
+                self._check_tag_pairs(unit)
+                unit.container = None
+            unit.depth -= 1
+        elif name == 'internal_file':
+            self._close_skeleton()
+        elif name == 'file':
+            self._check_file()
+
+    def _char_data(self, data):
+        if self._unit is not None:
+            if self._unit.container == 'target' and data.strip():
+                self._unit.target_is_empty = False
+        elif self._skeleton is not None:
+            try:
+                self._skeleton.feed(data)
+            except (ValueError, UnicodeError):
+                self._skeleton_error()
+
+    def _check_tag_pairs(self, unit):
+        for id_ in unit.bpt_ids.keys() - unit.ept_ids.keys():
+            self._add_issue(unit.bpt_ids[id_], unit.id,
+                            'Unmatched <bpt id="{}"> in <{}>'.format(id_, unit.container))
+        for id_ in unit.ept_ids.keys() - unit.bpt_ids.keys():
+            self._add_issue(unit.ept_ids[id_], unit.id,
+                            'Unmatched <ept id="{}"> in <{}>'.format(id_, unit.container))
+
+    def _check_unit(self, unit):
+        if self._strict:
+            if not unit.has_target:
+                self._add_issue(unit.line, unit.id, 'Missing translation')
+            elif unit.target_is_empty:
+                self._add_issue(unit.line, unit.id, 'Empty translation')
+        if (self._placeholder_ids is not None and unit.id and
+                unit.id not in self._placeholder_ids):
+            self._add_issue(unit.line, unit.id,
+                            'Trans-unit id is not present in the skeleton')
+
+    def _close_skeleton(self):
+        if self._skeleton is None:
+            # The error has already been reported
+            return
+        try:
+            self._skeleton.close()
+        except (ValueError, UnicodeError):
+            self._skeleton_error()
+            return
+        self._placeholder_ids = self._skeleton.ids
+        self._skeleton = None
+
+    def _skeleton_error(self):
+        self._add_issue(self._skeleton_line, None, 'Skeleton is not valid base64 data')
+        self._skeleton = None
+
+    def _check_file(self):
+        if self._skeleton_line is None:
+            self._add_issue(self._file_line, None, 'XLIFF has no document skeleton')
+        if self._placeholder_ids is None:
+            return
+        for id_ in sorted(self._placeholder_ids - self._unit_ids, key=int):
+            self._add_issue(self._skeleton_line, id_,
+                            'Skeleton placeholder has no trans-unit')
+
+
+def validate_xliff(xliff, strict=True):
+    """
+    Check a translated XLIFF 1.2 document before rebuilding HTML
+
+    The document is parsed once in a streaming fashion and all found issues
+    are reported, not only the first one.
+
+    :param xliff: translated XLIFF document or a file object opened
+        in binary mode
+    :type xliff: str, bytes, io.BufferedIOBase
+    :param strict: if ``True`` missing translations are reported as issues.
+        If ``False`` partially translated documents are accepted.
+    :type strict: bool
+    :return: the list of found issues, empty if the document is valid
+    :rtype: list
+    """
+    validator = XliffValidator(strict)
+    if hasattr(xliff, 'read'):
+        while True:
+            chunk = xliff.read(CHUNK_SIZE)
+            if not chunk:
+                validator.feed(b'', True)
+                break
+            if not validator.feed(chunk):
+                break
+    else:
+        validator.feed(xliff, True)
+    return validator.issues